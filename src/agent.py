@@ -1,23 +1,29 @@
+import asyncio
+import contextlib
+import dataclasses
 import json
 import logging
 import os
 import sys
+import tempfile
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from dataclasses import dataclass
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, field
 from typing import Annotated, Literal
 
 from database import (
     COMMON_INSTRUCTIONS,
     FakeDB,
+    ItemCategory,
+    ItemSize,
     MenuItem,
-    find_items_by_id,
     menu_instructions,
 )
 from dotenv import load_dotenv
-from order import OrderedCombo, OrderedHappy, OrderedRegular, OrderState
-from pydantic import Field
+from order import OrderedCombo, OrderedHappy, OrderedItem, OrderedRegular, OrderState
+from pydantic import Field, TypeAdapter
 
 from livekit.agents import (
     Agent,
@@ -36,129 +42,274 @@ from livekit.agents import (
 from livekit.plugins import silero
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
 
+# dump_json falls back to the stdlib encoder on the odd install without orjson
+try:
+    import orjson
+
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
+
 load_dotenv(".env.local")
 
 logger = logging.getLogger("drive-thru")
 
+RECEIPT_PATH = "src/receipt.json"
+# resolved once at import, rather than on every session start
+BG_NOISE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bg_noise.mp3")
+
+# sizes accepted by the order tools, "null" lets the LLM explicitly pick no size
+Size = Literal["S", "M", "L", "null"]
+
+# a single adapter serializes a whole batch of ordered items in one call
+_ITEMS_ADAPTER = TypeAdapter(list[OrderedItem])
+
+
+@dataclass(slots=True)
+class ReceiptRow:
+    order_id: str
+    name: str = ""
+    sub_items: list[str] = field(default_factory=list)
+    price: float = 0.0
+
+
+@dataclass(slots=True)
+class Receipt:
+    """The enriched order written to receipt.json for receipt.html to display."""
 
-@dataclass
+    items: list[ReceiptRow]
+    total_price: float
+
+
+@dataclass(slots=True)
 class Userdata:
     order: OrderState
-    drink_items: list[MenuItem]
-    combo_items: list[MenuItem]
-    happy_items: list[MenuItem]
-    regular_items: list[MenuItem]
-    sauce_items: list[MenuItem]
+    drink_items: tuple[MenuItem, ...]
+    combo_items: tuple[MenuItem, ...]
+    happy_items: tuple[MenuItem, ...]
+    regular_items: tuple[MenuItem, ...]
+    sauce_items: tuple[MenuItem, ...]
+    # grouped by id so the size variants of an item are kept together
+    by_id: Mapping[str, tuple[MenuItem, ...]]
+    # sizes offered for each id, in menu order (empty when the item isn't sized)
+    sizes_by_id: dict[str, tuple[ItemSize, ...]]
+    # ids offered to the LLM through the tool schemas, computed once and shared by the tools
+    drink_ids: tuple[str, ...]
+    sauce_enum: tuple[str, ...]  # sauce ids, plus "null" for no sauce
+    combo_ids: tuple[str, ...]
+    happy_ids: tuple[str, ...]
+    regular_plus_ids: tuple[str, ...]
+    # system prompt, built once since the menus don't change during a session
+    instructions: str
+    receipt_writer: "ReceiptWriter"
+    # enriched receipt rows keyed by order_id, updated incrementally as the order changes
+    receipt_rows: dict[str, ReceiptRow] = field(default_factory=dict)
+    receipt_total: float = 0.0
+
+
+def dump_json(data, *, default=None, indent: bool = False) -> bytes:
+    """Serializes `data` to JSON bytes, using orjson when available.
+
+    The output is compact unless `indent` is set, for output meant to be read by people.
+    """
+    if _HAS_ORJSON:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=default, option=option)
+    if indent:
+        return json.dumps(data, indent=2, default=default).encode("utf-8")
+    return json.dumps(data, separators=(",", ":"), default=default).encode("utf-8")
+
+
+def _in_category(items: Sequence[MenuItem], *categories: ItemCategory) -> bool:
+    # every size variant of an id shares the same category
+    return bool(items) and items[0].category in categories
+
+
+def _sorted_ids(*menus: Sequence[MenuItem]) -> tuple[str, ...]:
+    # size variants share an id; sorted so the tool schemas (and the LLM prompt
+    # prefix they are part of) are identical from one session to the next
+    return tuple(sorted({item.id for items in menus for item in items}))
 
 
 # --- ENRICHED RECEIPT WRITER ---
-def update_receipt_file(userdata: Userdata):
-    """Enriches the order with human-readable names and prices, then saves it."""
-    # Combine all menus into one list so we can easily search for IDs
-    all_menu_items = (
-        userdata.combo_items + userdata.happy_items + 
-        userdata.regular_items + userdata.drink_items + userdata.sauce_items
-    )
-
-    receipt_data = {
-        "items": [],
-        "total_price": 0.0
-    }
-
-    for item in userdata.order.items.values():
-        receipt_item = {
-            "order_id": item.order_id,
-            "name": "",
-            "sub_items": [],
-            "price": 0.0
-        }
-        item_total = 0.0
-
-        # Regular items
-        if item.type == "regular":
-            matches = find_items_by_id(all_menu_items, item.item_id, item.size)
-            if not matches: # Fallback if specific size isn't found
-                matches = find_items_by_id(all_menu_items, item.item_id)
-                
-            if matches:
-                mi = matches[0]
-                receipt_item["name"] = f"{mi.name} {f'({item.size})' if item.size else ''}".strip()
-                item_total += mi.price
-
-        # Combo and Happy Meals
-        elif item.type in ["combo_meal", "happy_meal"]:
-            matches = find_items_by_id(all_menu_items, item.meal_id)
-            if matches:
-                mi = matches[0]
-                receipt_item["name"] = mi.name
-                item_total += mi.price
-
-            # Add Drink
-            if item.drink_id:
-                d_matches = find_items_by_id(all_menu_items, item.drink_id, item.drink_size)
-                if not d_matches:
-                    d_matches = find_items_by_id(all_menu_items, item.drink_id)
-                if d_matches:
-                    d_mi = d_matches[0]
-                    receipt_item["sub_items"].append(f"+ {d_mi.name} {f'({item.drink_size})' if item.drink_size else ''}".strip())
-                    item_total += d_mi.price 
-
-            # Add Sauce/Chutney
-            if getattr(item, 'sauce_id', None):
-                s_matches = find_items_by_id(all_menu_items, item.sauce_id)
-                if s_matches:
-                    s_mi = s_matches[0]
-                    receipt_item["sub_items"].append(f"+ {s_mi.name}")
-                    item_total += s_mi.price
-
-        receipt_item["price"] = item_total
-        receipt_data["total_price"] += item_total
-        receipt_data["items"].append(receipt_item)
-
-    # Write the enriched data to the JSON file
-    with open("src/receipt.json", "w", encoding="utf-8") as f:
-        json.dump(receipt_data, f, indent=2)
+def _find_menu_item(
+    by_id: Mapping[str, tuple[MenuItem, ...]], item_id: str, size: str | None
+) -> MenuItem | None:
+    matches = by_id.get(item_id, ())
+    for mi in matches:
+        if size is None or mi.size == size:
+            return mi
+    # Fallback to any size if the specific size isn't found
+    return matches[0] if matches else None
+
+
+def _receipt_row(by_id: Mapping[str, tuple[MenuItem, ...]], item: OrderedItem) -> ReceiptRow:
+    row = ReceiptRow(order_id=item.order_id)
+
+    # Regular items
+    if item.type == "regular":
+        mi = _find_menu_item(by_id, item.item_id, item.size)
+        if mi:
+            row.name = f"{mi.name} {f'({item.size})' if item.size else ''}".strip()
+            row.price += mi.price
+
+    # Combo and Happy Meals
+    elif item.type in ("combo_meal", "happy_meal"):
+        mi = _find_menu_item(by_id, item.meal_id, None)
+        if mi:
+            row.name = mi.name
+            row.price += mi.price
+
+        # Add Drink
+        if item.drink_id:
+            d_mi = _find_menu_item(by_id, item.drink_id, item.drink_size)
+            if d_mi:
+                row.sub_items.append(f"+ {d_mi.name} {f'({item.drink_size})' if item.drink_size else ''}".strip())
+                row.price += d_mi.price
+
+        # Add Sauce/Chutney
+        if item.sauce_id:
+            s_mi = _find_menu_item(by_id, item.sauce_id, None)
+            if s_mi:
+                row.sub_items.append(f"+ {s_mi.name}")
+                row.price += s_mi.price
+
+    return row
+
+
+def _append_receipt(userdata: Userdata, item: OrderedItem) -> None:
+    """Adds the enriched row of a newly ordered item to the cached receipt."""
+    row = _receipt_row(userdata.by_id, item)
+    userdata.receipt_rows[item.order_id] = row
+    userdata.receipt_total += row.price
+
+
+def _remove_receipt(userdata: Userdata, order_id: str) -> None:
+    """Drops the row of a removed item from the cached receipt."""
+    row = userdata.receipt_rows.pop(order_id, None)
+    if row is not None:
+        # reset once empty so float rounding can't leave a stray total behind
+        if userdata.receipt_rows:
+            userdata.receipt_total -= row.price
+        else:
+            userdata.receipt_total = 0.0
+
+
+def build_receipt(userdata: Userdata) -> Receipt:
+    """Returns the enriched order, with human-readable names and prices."""
+    return Receipt(items=list(userdata.receipt_rows.values()), total_price=userdata.receipt_total)
+
+
+class ReceiptWriter:
+    """Writes the receipt from a background task so the tools never wait on disk I/O.
+
+    Only the latest pending update is kept: successive updates scheduled while a
+    write is in flight are coalesced into a single write of the newest order.
+    """
+
+    def __init__(self, path: str = RECEIPT_PATH) -> None:
+        self._path = path
+        # None is the sentinel that wakes an idle worker up on shutdown
+        self._pending: asyncio.Queue[Userdata | None] = asyncio.Queue(maxsize=1)
+        self._task: asyncio.Task[None] | None = None
+        self._closing = False
+        # order version currently on disk, writes of an unchanged order are skipped
+        self._written_version: int | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def schedule(self, userdata: Userdata) -> None:
+        if self._pending.full():
+            # the pending update is stale, replace it with the newest one
+            self._pending.get_nowait()
+        self._pending.put_nowait(userdata)
+
+    async def aclose(self) -> None:
+        """Stops the writer, once the write in flight and the pending update are on disk.
+
+        The worker is left to finish rather than cancelled: cancelling it would not stop a
+        write already running in its thread.
+        """
+        self._closing = True
+        if self._task is None:
+            # never started, flush the last update so the receipt doesn't lag behind the order
+            if not self._pending.empty():
+                userdata = self._pending.get_nowait()
+                if userdata is not None:
+                    await self._flush(userdata)
+            return
+
+        if self._pending.empty():
+            self._pending.put_nowait(None)
+        await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            userdata = await self._pending.get()
+            if userdata is not None:
+                await self._flush(userdata)
+            if self._closing and self._pending.empty():
+                return
+
+    async def _flush(self, userdata: Userdata) -> None:
+        version = userdata.order.version
+        if version == self._written_version:
+            return
+
+        try:
+            data = self._encode(userdata)
+            await asyncio.to_thread(self._write, data)
+        except Exception:
+            # a failed write must not stop the worker, later updates would be dropped
+            logger.exception("failed to write the receipt")
+        else:
+            self._written_version = version
+
+    @staticmethod
+    def _encode(userdata: Userdata) -> bytes:
+        # orjson serializes the dataclasses natively, asdict covers the stdlib fallback
+        return dump_json(build_receipt(userdata), default=dataclasses.asdict)
+
+    def _write(self, data: bytes) -> None:
+        # write to a temporary file and rename it over the receipt, so readers never
+        # observe a truncated or half-written file. The temporary file is unique so that
+        # concurrent writers on the same path can't write into each other's file.
+        directory, name = os.path.split(self._path)
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory or None)
+        try:
+            with open(fd, "wb") as f:
+                f.write(data)
+            # mkstemp only lets the owner read the file, keep the receipt readable by the web server
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, self._path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_path)
+            raise
+
+
+def update_receipt_file(userdata: Userdata) -> None:
+    """Schedules the enriched order to be saved, without waiting for the write."""
+    userdata.receipt_writer.schedule(userdata)
 
 
 class DriveThruAgent(Agent):
     def __init__(self, *, userdata: Userdata) -> None:
-        instructions = (
-            COMMON_INSTRUCTIONS
-            + "\n\n"
-            + menu_instructions("drink", items=userdata.drink_items)
-            + "\n\n"
-            + menu_instructions("combo_meal", items=userdata.combo_items)
-            + "\n\n"
-            + menu_instructions("happy_meal", items=userdata.happy_items)
-            + "\n\n"
-            + menu_instructions("regular", items=userdata.regular_items)
-            + "\n\n"
-            + menu_instructions("sauce", items=userdata.sauce_items)
-        )
-
         super().__init__(
-            instructions=instructions,
+            instructions=userdata.instructions,
             tools=[
-                self.build_regular_order_tool(
-                    userdata.regular_items, userdata.drink_items, userdata.sauce_items
-                ),
-                self.build_combo_order_tool(
-                    userdata.combo_items, userdata.drink_items, userdata.sauce_items
-                ),
-                self.build_happy_order_tool(
-                    userdata.happy_items, userdata.drink_items, userdata.sauce_items
-                ),
+                self.build_regular_order_tool(userdata),
+                self.build_combo_order_tool(userdata),
+                self.build_happy_order_tool(userdata),
             ],
         )
 
-        
-    def build_combo_order_tool(
-        self, combo_items: list[MenuItem], drink_items: list[MenuItem], sauce_items: list[MenuItem]
-    ) -> FunctionTool:
-        available_combo_ids = {item.id for item in combo_items}
-        available_drink_ids = {item.id for item in drink_items}
-        available_sauce_ids = {item.id for item in sauce_items}
-
+    def build_combo_order_tool(self, userdata: Userdata) -> FunctionTool:
         @function_tool
         async def order_combo_meal(
             ctx: RunContext[Userdata],
@@ -166,22 +317,22 @@ class DriveThruAgent(Agent):
                 str,
                 Field(
                     description="The ID of the combo meal or thali the user requested.",
-                    json_schema_extra={"enum": list(available_combo_ids)},
+                    json_schema_extra={"enum": userdata.combo_ids},
                 ),
             ],
             drink_id: Annotated[
                 str,
                 Field(
                     description="The ID of the drink the user requested.",
-                    json_schema_extra={"enum": list(available_drink_ids)},
+                    json_schema_extra={"enum": userdata.drink_ids},
                 ),
             ],
-            drink_size: Literal["S", "M", "L", "null"] | None,
+            drink_size: Size | None,
             sauce_id: Annotated[
                 str,
                 Field(
                     description="The ID of the chutney or extra the user requested.",
-                    json_schema_extra={"enum": [*available_sauce_ids, "null"]},
+                    json_schema_extra={"enum": userdata.sauce_enum},
                 ),
             ]
             | None,
@@ -197,11 +348,13 @@ class DriveThruAgent(Agent):
             A drink for a combo can be Small, Medium, or Large.
             If the user says just “a large meal,” assume the drink is that size.
             """
-            if not find_items_by_id(combo_items, meal_id):
+            userdata = ctx.userdata
+            by_id = userdata.by_id
+            if not _in_category(by_id.get(meal_id, ()), ItemCategory.COMBO_MEAL):
                 raise ToolError(f"error: the meal {meal_id} was not found")
 
-            drink_sizes = find_items_by_id(drink_items, drink_id)
-            if not drink_sizes:
+            drink_sizes = by_id.get(drink_id, ())
+            if not _in_category(drink_sizes, ItemCategory.DRINK):
                 raise ToolError(f"error: the drink {drink_id} was not found")
 
             if drink_size == "null":
@@ -210,7 +363,7 @@ class DriveThruAgent(Agent):
             if sauce_id == "null":
                 sauce_id = None
 
-            available_sizes = list({item.size for item in drink_sizes if item.size})
+            available_sizes = userdata.sizes_by_id[drink_id]
             if drink_size is None and len(available_sizes) > 1:
                 raise ToolError(
                     f"error: {drink_id} comes with multiple sizes: {', '.join(available_sizes)}. "
@@ -225,34 +378,27 @@ class DriveThruAgent(Agent):
             if drink_size and drink_size not in available_sizes:
                 drink_size = None
 
-            if sauce_id and not find_items_by_id(sauce_items, sauce_id):
+            if sauce_id and not _in_category(by_id.get(sauce_id, ()), ItemCategory.SAUCE):
                 raise ToolError(f"error: the sauce {sauce_id} was not found")
 
-            item = OrderedCombo(
+            # the arguments were already constrained by the tool schema and checked above
+            item = OrderedCombo.model_construct(
                 meal_id=meal_id,
                 drink_id=drink_id,
                 drink_size=drink_size,
                 sauce_id=sauce_id,
             )
-            await ctx.userdata.order.add(item)
+            await userdata.order.add(item)
+            _append_receipt(userdata, item)
             
             # --- WRITE ENRICHED DATA TO JSON FILE ---
-            update_receipt_file(ctx.userdata)
+            update_receipt_file(userdata)
             
             return f"The item was added: {item.model_dump_json()}"
 
         return order_combo_meal
 
-    def build_happy_order_tool(
-        self,
-        happy_items: list[MenuItem],
-        drink_items: list[MenuItem],
-        sauce_items: list[MenuItem],
-    ) -> FunctionTool:
-        available_happy_ids = {item.id for item in happy_items}
-        available_drink_ids = {item.id for item in drink_items}
-        available_sauce_ids = {item.id for item in sauce_items}
-
+    def build_happy_order_tool(self, userdata: Userdata) -> FunctionTool:
         @function_tool
         async def order_happy_meal(
             ctx: RunContext[Userdata],
@@ -260,22 +406,22 @@ class DriveThruAgent(Agent):
                 str,
                 Field(
                     description="The ID of the kid's meal the user requested.",
-                    json_schema_extra={"enum": list(available_happy_ids)},
+                    json_schema_extra={"enum": userdata.happy_ids},
                 ),
             ],
             drink_id: Annotated[
                 str,
                 Field(
                     description="The ID of the drink the user requested.",
-                    json_schema_extra={"enum": list(available_drink_ids)},
+                    json_schema_extra={"enum": userdata.drink_ids},
                 ),
             ],
-            drink_size: Literal["S", "M", "L", "null"] | None,
+            drink_size: Size | None,
             sauce_id: Annotated[
                 str,
                 Field(
                     description="The ID of the chutney or extra the user requested.",
-                    json_schema_extra={"enum": [*available_sauce_ids, "null"]},
+                    json_schema_extra={"enum": userdata.sauce_enum},
                 ),
             ]
             | None,
@@ -291,11 +437,13 @@ class DriveThruAgent(Agent):
 
             Assume Small as default only if the user says "Kid's Meal" and gives no size preference, but always ask for clarification if unsure.
             """
-            if not find_items_by_id(happy_items, meal_id):
+            userdata = ctx.userdata
+            by_id = userdata.by_id
+            if not _in_category(by_id.get(meal_id, ()), ItemCategory.HAPPY_MEAL):
                 raise ToolError(f"error: the meal {meal_id} was not found")
 
-            drink_sizes = find_items_by_id(drink_items, drink_id)
-            if not drink_sizes:
+            drink_sizes = by_id.get(drink_id, ())
+            if not _in_category(drink_sizes, ItemCategory.DRINK):
                 raise ToolError(f"error: the drink {drink_id} was not found")
 
             if drink_size == "null":
@@ -304,7 +452,7 @@ class DriveThruAgent(Agent):
             if sauce_id == "null":
                 sauce_id = None
 
-            available_sizes = list({item.size for item in drink_sizes if item.size})
+            available_sizes = userdata.sizes_by_id[drink_id]
             if drink_size is None and len(available_sizes) > 1:
                 raise ToolError(
                     f"error: {drink_id} comes with multiple sizes: {', '.join(available_sizes)}. "
@@ -314,33 +462,27 @@ class DriveThruAgent(Agent):
             if drink_size is not None and not available_sizes:
                 drink_size = None
 
-            if sauce_id and not find_items_by_id(sauce_items, sauce_id):
+            if sauce_id and not _in_category(by_id.get(sauce_id, ()), ItemCategory.SAUCE):
                 raise ToolError(f"error: the sauce {sauce_id} was not found")
 
-            item = OrderedHappy(
+            # the arguments were already constrained by the tool schema and checked above
+            item = OrderedHappy.model_construct(
                 meal_id=meal_id,
                 drink_id=drink_id,
                 drink_size=drink_size,
                 sauce_id=sauce_id,
             )
-            await ctx.userdata.order.add(item)
+            await userdata.order.add(item)
+            _append_receipt(userdata, item)
             
             # --- WRITE ENRICHED DATA TO JSON FILE ---
-            update_receipt_file(ctx.userdata)
+            update_receipt_file(userdata)
             
             return f"The item was added: {item.model_dump_json()}"
 
         return order_happy_meal
 
-    def build_regular_order_tool(
-        self,
-        regular_items: list[MenuItem],
-        drink_items: list[MenuItem],
-        sauce_items: list[MenuItem],
-    ) -> FunctionTool:
-        all_items = regular_items + drink_items + sauce_items
-        available_ids = {item.id for item in all_items}
-
+    def build_regular_order_tool(self, userdata: Userdata) -> FunctionTool:
         @function_tool
         async def order_regular_item(
             ctx: RunContext[Userdata],
@@ -348,11 +490,11 @@ class DriveThruAgent(Agent):
                 str,
                 Field(
                     description="The ID of the item the user requested.",
-                    json_schema_extra={"enum": list(available_ids)},
+                    json_schema_extra={"enum": userdata.regular_plus_ids},
                 ),
             ],
             size: Annotated[
-                Literal["S", "M", "L", "null"] | None,
+                Size | None,
                 Field(
                     description="Size of the item, if applicable (e.g., 'S', 'M', 'L'), otherwise 'null'. "
                 ),
@@ -369,14 +511,17 @@ class DriveThruAgent(Agent):
             - “Can I get some Mint Chutney?”
             - “Can I get a Gulab Jamun?”
             """
-            item_sizes = find_items_by_id(all_items, item_id)
-            if not item_sizes:
+            userdata = ctx.userdata
+            item_sizes = userdata.by_id.get(item_id, ())
+            if not _in_category(
+                item_sizes, ItemCategory.REGULAR, ItemCategory.DRINK, ItemCategory.SAUCE
+            ):
                 raise ToolError(f"error: {item_id} was not found.")
 
             if size == "null":
                 size = None
 
-            available_sizes = list({item.size for item in item_sizes if item.size})
+            available_sizes = userdata.sizes_by_id[item_id]
             if size is None and len(available_sizes) > 1:
                 raise ToolError(
                     f"error: {item_id} comes with multiple sizes: {', '.join(available_sizes)}. "
@@ -391,11 +536,13 @@ class DriveThruAgent(Agent):
                     f"error: unknown size {size} for {item_id}. Available sizes: {', '.join(available_sizes)}."
                 )
 
-            item = OrderedRegular(item_id=item_id, size=size)
-            await ctx.userdata.order.add(item)
+            # the arguments were already constrained by the tool schema and checked above
+            item = OrderedRegular.model_construct(item_id=item_id, size=size)
+            await userdata.order.add(item)
+            _append_receipt(userdata, item)
             
             # --- WRITE ENRICHED DATA TO JSON FILE ---
-            update_receipt_file(ctx.userdata)
+            update_receipt_file(userdata)
             
             return f"The item was added: {item.model_dump_json()}"
 
@@ -419,16 +566,23 @@ class DriveThruAgent(Agent):
 
         If the `order_id`s are unknown, call `list_order_items` first to retrieve them.
         """
-        not_found = [oid for oid in order_id if oid not in ctx.userdata.order.items]
+        userdata = ctx.userdata
+        # a repeated id would fail on its second removal, after the first one went through
+        order_ids = list(dict.fromkeys(order_id))
+        not_found = [oid for oid in order_ids if oid not in userdata.order.items]
         if not_found:
             raise ToolError(f"error: no item(s) found with order_id(s): {', '.join(not_found)}")
 
-        removed_items = [await ctx.userdata.order.remove(oid) for oid in order_id]
+        removed_items = []
+        for oid in order_ids:
+            # the cached receipt row goes with its item, so the two can't fall out of sync
+            removed_items.append(await userdata.order.remove(oid))
+            _remove_receipt(userdata, oid)
         
         # --- WRITE ENRICHED DATA TO JSON FILE ---
-        update_receipt_file(ctx.userdata)
+        update_receipt_file(userdata)
         
-        return "Removed items:\n" + "\n".join(item.model_dump_json() for item in removed_items)
+        return "Removed items:\n" + _ITEMS_ADAPTER.dump_json(removed_items).decode("utf-8")
 
     @function_tool
     async def list_order_items(self, ctx: RunContext[Userdata]) -> str:
@@ -448,16 +602,33 @@ class DriveThruAgent(Agent):
         if not items:
             return "The order is empty"
 
-        return "\n".join(item.model_dump_json() for item in items)
+        return _ITEMS_ADAPTER.dump_json(list(items)).decode("utf-8")
 
 
 async def new_userdata() -> Userdata:
     fake_db = FakeDB()
-    drink_items = await fake_db.list_drinks()
-    combo_items = await fake_db.list_combo_meals()
-    happy_items = await fake_db.list_happy_meals()
-    regular_items = await fake_db.list_regulars()
-    sauce_items = await fake_db.list_sauces()
+    menu, by_id = await asyncio.gather(fake_db.list_all(), fake_db.list_items_by_id())
+    drink_items = menu[ItemCategory.DRINK]
+    combo_items = menu[ItemCategory.COMBO_MEAL]
+    happy_items = menu[ItemCategory.HAPPY_MEAL]
+    regular_items = menu[ItemCategory.REGULAR]
+    sauce_items = menu[ItemCategory.SAUCE]
+
+    sizes_by_id = {
+        item_id: tuple(dict.fromkeys(item.size for item in variants if item.size))
+        for item_id, variants in by_id.items()
+    }
+
+    instructions = "\n\n".join(
+        (
+            COMMON_INSTRUCTIONS,
+            menu_instructions(ItemCategory.DRINK),
+            menu_instructions(ItemCategory.COMBO_MEAL),
+            menu_instructions(ItemCategory.HAPPY_MEAL),
+            menu_instructions(ItemCategory.REGULAR),
+            menu_instructions(ItemCategory.SAUCE),
+        )
+    )
 
     order_state = OrderState(items={})
     userdata = Userdata(
@@ -467,6 +638,15 @@ async def new_userdata() -> Userdata:
         happy_items=happy_items,
         regular_items=regular_items,
         sauce_items=sauce_items,
+        by_id=by_id,
+        sizes_by_id=sizes_by_id,
+        drink_ids=_sorted_ids(drink_items),
+        sauce_enum=(*_sorted_ids(sauce_items), "null"),
+        combo_ids=_sorted_ids(combo_items),
+        happy_ids=_sorted_ids(happy_items),
+        regular_plus_ids=_sorted_ids(regular_items, drink_items, sauce_items),
+        instructions=instructions,
+        receipt_writer=ReceiptWriter(),
     )
     return userdata
 
@@ -477,7 +657,7 @@ server = AgentServer()
 async def on_session_end(ctx: JobContext) -> None:
     report = ctx.make_session_report()
     # Add 'default=str' to safely handle complex objects like the LLM
-    report_json = json.dumps(report.to_dict(), indent=2, default=str)
+    report_json = dump_json(report.to_dict(), default=str, indent=True).decode("utf-8")
     
     # Optional: Print it so you can actually see the report in your terminal!
     print(f"\n--- SESSION REPORT ---\n{report_json}\n----------------------\n")
@@ -487,9 +667,11 @@ async def on_session_end(ctx: JobContext) -> None:
 async def drive_thru_agent(ctx: JobContext) -> None:
     userdata = await new_userdata()
     
+    userdata.receipt_writer.start()
+    ctx.add_shutdown_callback(userdata.receipt_writer.aclose)
+
     # Optional: Clear the receipt.json with an empty schema when a new session starts
-    with open("receipt.json", "w", encoding="utf-8") as f:
-        json.dump({"items": [], "total_price": 0.0}, f, indent=2)
+    update_receipt_file(userdata)
         
     session = AgentSession[Userdata](
         userdata=userdata,
@@ -519,7 +701,7 @@ async def drive_thru_agent(ctx: JobContext) -> None:
 
     background_audio = BackgroundAudioPlayer(
         ambient_sound=AudioConfig(
-            str(os.path.join(os.path.dirname(os.path.abspath(__file__)), "bg_noise.mp3")),
+            BG_NOISE_PATH,
             volume=1.0,
         ),
     )
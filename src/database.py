@@ -1,9 +1,22 @@
 from __future__ import annotations
 
-from collections import defaultdict
-from typing import Literal
-
-from pydantic import BaseModel
+import asyncio
+import functools
+import sys
+from collections.abc import Callable, Mapping, Sequence
+from dataclasses import dataclass, field
+from types import MappingProxyType
+
+# checked by version rather than try/except ImportError so that mypy (and mypyc) can
+# follow which definition is in use
+if sys.version_info >= (3, 11):
+    from enum import StrEnum
+else:
+    from enum import Enum
+
+    class StrEnum(str, Enum):
+        def __str__(self) -> str:
+            return str(self.value)
 
 COMMON_INSTRUCTIONS = (
     "You are saanvi, a quick and friendly attendant at 'Spice Route', a popular Indian fast-casual restaurant. \n"
@@ -49,516 +62,378 @@ COMMON_INSTRUCTIONS = (
 )
 
 
-ItemSize = Literal["S", "M", "L"]
-ItemCategory = Literal["drink", "combo_meal", "happy_meal", "regular", "sauce"]
+# str enums still compare and hash equal to their plain string values
+class ItemSize(StrEnum):
+    S = "S"
+    M = "M"
+    L = "L"
+
+
+class ItemCategory(StrEnum):
+    DRINK = "drink"
+    COMBO_MEAL = "combo_meal"
+    HAPPY_MEAL = "happy_meal"
+    REGULAR = "regular"
+    SAUCE = "sauce"
 
 
-class MenuItem(BaseModel):
+@dataclass(slots=True, frozen=True)
+class MenuItem:
     id: str
     name: str
     calories: int
     price: float
     available: bool
+    category: ItemCategory
     size: ItemSize | None = None
     voice_alias: str | None = None
-    category: ItemCategory
-
-
-class FakeDB:
-    async def list_drinks(self) -> list[MenuItem]:
-        drink_data = [
-            {
-                "id": "thums_up",
-                "name": "Thums Up®",
-                "sizes": {
-                    "S": {"calories": 150, "price": 40.00},
-                    "M": {"calories": 200, "price": 50.00},
-                    "L": {"calories": 280, "price": 60.00},
-                },
-            },
-            {
-                "id": "limca",
-                "name": "Limca®",
-                "sizes": {
-                    "S": {"calories": 140, "price": 40.00},
-                    "M": {"calories": 190, "price": 50.00},
-                    "L": {"calories": 270, "price": 60.00},
-                },
-            },
-            {
-                "id": "mango_lassi",
-                "name": "Mango Lassi",
-                "sizes": {
-                    "S": {"calories": 250, "price": 80.00},
-                    "M": {"calories": 350, "price": 110.00},
-                    "L": {"calories": 480, "price": 150.00},
-                },
-            },
-            {
-                "id": "sweet_lassi",
-                "name": "Sweet Lassi",
-                "sizes": {
-                    "S": {"calories": 220, "price": 70.00},
-                    "M": {"calories": 310, "price": 90.00},
-                    "L": {"calories": 420, "price": 130.00},
-                },
-            },
-            {
-                "id": "salted_lassi",
-                "name": "Salted Lassi",
-                "sizes": {
-                    "S": {"calories": 150, "price": 60.00},
-                    "M": {"calories": 200, "price": 80.00},
-                    "L": {"calories": 280, "price": 110.00},
-                },
-                "available": False,
-            },
-            {
-                "id": "masala_chai",
-                "name": "Masala Chai",
-                "sizes": {
-                    "S": {"calories": 120, "price": 30.00},
-                    "M": {"calories": 180, "price": 50.00},
-                    "L": {"calories": 240, "price": 70.00},
-                },
-            },
-            {
-                "id": "filter_coffee",
-                "name": "Filter Coffee",
-                "sizes": {
-                    "S": {"calories": 100, "price": 40.00},
-                    "M": {"calories": 150, "price": 60.00},
-                    "L": {"calories": 200, "price": 80.00},
-                },
-            },
-            {
-                "id": "nimbu_pani",
-                "name": "Fresh Nimbu Pani",
-                "sizes": {
-                    "S": {"calories": 90, "price": 40.00},
-                    "M": {"calories": 140, "price": 60.00},
-                    "L": {"calories": 190, "price": 80.00},
-                },
-            },
-            {
-                "id": "bottled_water",
-                "name": "Kinley® Mineral Water",
-                "calories": 0,
-                "price": 20.00,
-            },
-        ]
-
-        items = []
-        for item in drink_data:
-            if sizes := item.get("sizes", {}):
-                for size, size_details in sizes.items():
-                    items.append(
-                        MenuItem(
-                            id=item["id"],
-                            name=item["name"],
-                            calories=size_details["calories"],
-                            price=size_details["price"],
-                            size=size,
-                            available=item.get("available", True),
-                            category="drink",
-                        )
-                    )
-            else:
-                items.append(
-                    MenuItem(
-                        id=item["id"],
-                        name=item["name"],
-                        calories=item["calories"],
-                        price=item["price"],
-                        available=item.get("available", True),
-                        category="drink",
-                    )
-                )
+    # derived from the fields above in __post_init__, the item is frozen so they never go
+    # stale
+    formatted_line: str = field(init=False, repr=False, compare=False)
+    avail_suffix: str = field(init=False, repr=False, compare=False)
+    menu_line: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # calories and price as listed on the menu, formatted once per item
+        object.__setattr__(self, "formatted_line", f"{self.calories} Cal, ₹{self.price:.2f}")
+        # appended to the item's menu line, so rendering needs no availability branch
+        object.__setattr__(self, "avail_suffix", "" if self.available else " UNAVAILABLE")
+        # the item's line in its category's menu section, rendered once per item
+        object.__setattr__(self, "menu_line", self._render_menu_line())
+
+    def _render_menu_line(self) -> str:
+        if self.size:
+            return f"    - Size {self.size}: {self.formatted_line}{self.avail_suffix}"
+        if self.category == ItemCategory.COMBO_MEAL:
+            return f"  **{self.voice_alias}**. {self.name}: {self.formatted_line} (id:{self.id}){self.avail_suffix}"
+        if self.category == ItemCategory.DRINK:
+            # explicitely saying there is no `size` for this item, otherwise the LLM seems to hallucinate quite often
+            return f"  - {self.name}: {self.formatted_line} (id:{self.id}) - Not size-selectable`{self.avail_suffix}"
+        if self.category == ItemCategory.REGULAR:
+            return f"  - {self.name}: {self.formatted_line} (id:{self.id}) - Not size-selectable{self.avail_suffix}"
+        return f"  - {self.name}: {self.formatted_line} (id:{self.id}){self.avail_suffix}"
+
+
+def _build_drinks() -> list[MenuItem]:
+    # (id, name, available, ((size, calories, price), ...)), the size is None for
+    # drinks that don't come in sizes
+    drink_data = (
+        ("thums_up", "Thums Up®", True, (("S", 150, 40.00), ("M", 200, 50.00), ("L", 280, 60.00))),
+        ("limca", "Limca®", True, (("S", 140, 40.00), ("M", 190, 50.00), ("L", 270, 60.00))),
+        ("mango_lassi", "Mango Lassi", True, (("S", 250, 80.00), ("M", 350, 110.00), ("L", 480, 150.00))),
+        ("sweet_lassi", "Sweet Lassi", True, (("S", 220, 70.00), ("M", 310, 90.00), ("L", 420, 130.00))),
+        ("salted_lassi", "Salted Lassi", False, (("S", 150, 60.00), ("M", 200, 80.00), ("L", 280, 110.00))),
+        ("masala_chai", "Masala Chai", True, (("S", 120, 30.00), ("M", 180, 50.00), ("L", 240, 70.00))),
+        ("filter_coffee", "Filter Coffee", True, (("S", 100, 40.00), ("M", 150, 60.00), ("L", 200, 80.00))),
+        ("nimbu_pani", "Fresh Nimbu Pani", True, (("S", 90, 40.00), ("M", 140, 60.00), ("L", 190, 80.00))),
+        ("bottled_water", "Kinley® Mineral Water", True, ((None, 0, 20.00),)),
+    )
 
-        return items
-
-    async def list_combo_meals(self) -> list[MenuItem]:
-        raw_meals = [
-            {
-                "id": "combo_butter_chicken",
-                "name": "Butter Chicken Thali Combo",
-                "alias": "1",
-                "calories": 1250,
-                "price": 350.00,
-            },
-            {
-                "id": "combo_paneer_tikka_masala",
-                "name": "Paneer Tikka Masala Thali Combo",
-                "alias": "2",
-                "calories": 1150,
-                "price": 320.00,
-            },
-            {
-                "id": "combo_chole_bhature",
-                "name": "Chole Bhature Combo",
-                "alias": "3",
-                "calories": 980,
-                "price": 220.00,
-            },
-            {
-                "id": "combo_masala_dosa",
-                "name": "Masala Dosa Combo",
-                "alias": "4",
-                "calories": 650,
-                "price": 180.00,
-            },
-            {
-                "id": "combo_chicken_biryani",
-                "name": "Chicken Dum Biryani Combo",
-                "alias": "5",
-                "calories": 1100,
-                "price": 340.00,
-            },
-            {
-                "id": "combo_veg_biryani",
-                "name": "Veg Biryani Combo",
-                "alias": "6",
-                "calories": 950,
-                "price": 280.00,
-            },
-            {
-                "id": "combo_samosa_chaat",
-                "name": "Samosa Chaat & Chai Combo",
-                "alias": "7",
-                "calories": 620,
-                "price": 150.00,
-            },
-            {
-                "id": "combo_pav_bhaji",
-                "name": "Mumbai Pav Bhaji Combo",
-                "alias": "8",
-                "calories": 850,
-                "price": 190.00,
-            },
-        ]
-
-        meals = []
-
-        for item in raw_meals:
-            meals.append(
+    items = []
+    for item_id, name, available, sizes in drink_data:
+        for size, calories, price in sizes:
+            items.append(
                 MenuItem(
-                    id=item["id"],
-                    name=item["name"],
-                    calories=item["calories"],
-                    price=item["price"],
-                    voice_alias=item["alias"],
-                    category="combo_meal",
-                    available=True,
+                    id=sys.intern(item_id),
+                    name=sys.intern(name),
+                    calories=calories,
+                    price=price,
+                    size=ItemSize(size) if size else None,
+                    available=available,
+                    category=ItemCategory.DRINK,
+                    voice_alias=None,
                 )
             )
 
-        return meals
-
-    async def list_happy_meals(self) -> list[MenuItem]:
-        raw_happy_meals = [
-            {
-                "id": "kids_mini_dosa",
-                "name": "Mini Cheese Dosa Kid's Meal",
-                "calories": 400,
-                "price": 140.00,
-            },
-            {
-                "id": "kids_butter_paneer",
-                "name": "Kid's Butter Paneer & Rice Meal",
-                "calories": 550,
-                "price": 180.00,
-            },
-            {
-                "id": "kids_sweet_pulao",
-                "name": "Kid's Sweet Pulao Meal",
-                "calories": 450,
-                "price": 150.00,
-            },
-        ]
-
-        meals = []
-
-        for item in raw_happy_meals:
-            meals.append(
-                MenuItem(
-                    id=item["id"],
-                    name=item["name"],
-                    calories=item["calories"],
-                    price=item["price"],
-                    available=True,
-                    category="happy_meal",
-                )
+    return items
+
+
+def _build_combo_meals() -> list[MenuItem]:
+    # (id, name, voice alias, calories, price)
+    raw_meals = (
+        ("combo_butter_chicken", "Butter Chicken Thali Combo", "1", 1250, 350.00),
+        ("combo_paneer_tikka_masala", "Paneer Tikka Masala Thali Combo", "2", 1150, 320.00),
+        ("combo_chole_bhature", "Chole Bhature Combo", "3", 980, 220.00),
+        ("combo_masala_dosa", "Masala Dosa Combo", "4", 650, 180.00),
+        ("combo_chicken_biryani", "Chicken Dum Biryani Combo", "5", 1100, 340.00),
+        ("combo_veg_biryani", "Veg Biryani Combo", "6", 950, 280.00),
+        ("combo_samosa_chaat", "Samosa Chaat & Chai Combo", "7", 620, 150.00),
+        ("combo_pav_bhaji", "Mumbai Pav Bhaji Combo", "8", 850, 190.00),
+    )
+
+    meals = []
+
+    for item_id, name, alias, calories, price in raw_meals:
+        meals.append(
+            MenuItem(
+                id=sys.intern(item_id),
+                name=sys.intern(name),
+                calories=calories,
+                price=price,
+                voice_alias=sys.intern(alias),
+                category=ItemCategory.COMBO_MEAL,
+                available=True,
+                size=None,
             )
+        )
 
-        return meals
-
-    async def list_regulars(self) -> list[MenuItem]:
-        raw_items = [
-            {
-                "id": "samosa_2pc",
-                "name": "Punjabi Samosa (2 pc)",
-                "calories": 520,
-                "price": 60.00,
-            },
-            {
-                "id": "vada_pav",
-                "name": "Vada Pav",
-                "calories": 300,
-                "price": 40.00,
-            },
-            {
-                "id": "butter_naan",
-                "name": "Butter Naan",
-                "calories": 280,
-                "price": 50.00,
-            },
-            {
-                "id": "garlic_naan",
-                "name": "Garlic Naan",
-                "calories": 300,
-                "price": 60.00,
-            },
-            {
-                "id": "tandoori_roti",
-                "name": "Tandoori Roti",
-                "calories": 180,
-                "price": 30.00,
-            },
-            {
-                "id": "chicken_tikka_app",
-                "name": "Chicken Tikka (6 pc)",
-                "calories": 450,
-                "price": 240.00,
-            },
-            {
-                "id": "paneer_tikka_app",
-                "name": "Paneer Tikka (6 pc)",
-                "calories": 550,
-                "price": 220.00,
-            },
-            {
-                "id": "gulab_jamun",
-                "name": "Gulab Jamun (2 pc)",
-                "calories": 350,
-                "price": 70.00,
-            },
-            {
-                "id": "rasmalai",
-                "name": "Rasmalai (2 pc)",
-                "calories": 400,
-                "price": 90.00,
-            },
-            {
-                "id": "gajar_halwa",
-                "name": "Gajar Ka Halwa",
-                "calories": 450,
-                "price": 110.00,
-            },
-        ]
-
-        items = []
-        for item in raw_items:
-            if sizes := item.get("sizes", {}):
-                for size, size_details in sizes.items():
-                    items.append(
-                        MenuItem(
-                            id=item["id"],
-                            name=item["name"],
-                            calories=size_details["calories"],
-                            price=size_details["price"],
-                            size=size,
-                            available=True,
-                            category="regular",
-                        )
-                    )
-            else:
-                items.append(
-                    MenuItem(
-                        id=item["id"],
-                        name=item["name"],
-                        calories=item["calories"],
-                        price=item["price"],
-                        available=True,
-                        category="regular",
-                    )
-                )
+    return meals
 
-        return items
-
-    async def list_sauces(self) -> list[MenuItem]:
-        raw_items = [
-            {
-                "id": "mint_chutney",
-                "name": "Mint Coriander Chutney",
-                "calories": 25,
-                "price": 15.00,
-            },
-            {
-                "id": "tamarind_chutney",
-                "name": "Sweet Tamarind Chutney",
-                "calories": 60,
-                "price": 15.00,
-            },
-            {
-                "id": "garlic_chutney",
-                "name": "Spicy Garlic Chutney",
-                "calories": 40,
-                "price": 15.00,
-            },
-            {
-                "id": "boondi_raita",
-                "name": "Boondi Raita",
-                "calories": 120,
-                "price": 40.00,
-            },
-            {
-                "id": "mixed_pickle",
-                "name": "Mixed Pickle (Achar)",
-                "calories": 50,
-                "price": 10.00,
-            },
-            {
-                "id": "onion_salad",
-                "name": "Lachha Onion Salad",
-                "calories": 30,
-                "price": 20.00,
-            },
-        ]
-        sauces = []
-
-        for item in raw_items:
-            sauces.append(
-                MenuItem(
-                    id=item["id"],
-                    name=item["name"],
-                    calories=item["calories"],
-                    price=item["price"],
-                    available=True,
-                    category="sauce",
-                )
+
+def _build_happy_meals() -> list[MenuItem]:
+    # (id, name, calories, price)
+    raw_happy_meals = (
+        ("kids_mini_dosa", "Mini Cheese Dosa Kid's Meal", 400, 140.00),
+        ("kids_butter_paneer", "Kid's Butter Paneer & Rice Meal", 550, 180.00),
+        ("kids_sweet_pulao", "Kid's Sweet Pulao Meal", 450, 150.00),
+    )
+
+    meals = []
+
+    for item_id, name, calories, price in raw_happy_meals:
+        meals.append(
+            MenuItem(
+                id=sys.intern(item_id),
+                name=sys.intern(name),
+                calories=calories,
+                price=price,
+                available=True,
+                category=ItemCategory.HAPPY_MEAL,
+                size=None,
+                voice_alias=None,
             )
+        )
+
+    return meals
+
+
+def _build_regulars() -> list[MenuItem]:
+    # (id, name, calories, price)
+    raw_items = (
+        ("samosa_2pc", "Punjabi Samosa (2 pc)", 520, 60.00),
+        ("vada_pav", "Vada Pav", 300, 40.00),
+        ("butter_naan", "Butter Naan", 280, 50.00),
+        ("garlic_naan", "Garlic Naan", 300, 60.00),
+        ("tandoori_roti", "Tandoori Roti", 180, 30.00),
+        ("chicken_tikka_app", "Chicken Tikka (6 pc)", 450, 240.00),
+        ("paneer_tikka_app", "Paneer Tikka (6 pc)", 550, 220.00),
+        ("gulab_jamun", "Gulab Jamun (2 pc)", 350, 70.00),
+        ("rasmalai", "Rasmalai (2 pc)", 400, 90.00),
+        ("gajar_halwa", "Gajar Ka Halwa", 450, 110.00),
+    )
+
+    items = []
+    for item_id, name, calories, price in raw_items:
+        items.append(
+            MenuItem(
+                id=sys.intern(item_id),
+                name=sys.intern(name),
+                calories=calories,
+                price=price,
+                available=True,
+                category=ItemCategory.REGULAR,
+                size=None,
+                voice_alias=None,
+            )
+        )
+
+    return items
+
+
+def _build_sauces() -> list[MenuItem]:
+    # (id, name, calories, price)
+    raw_items = (
+        ("mint_chutney", "Mint Coriander Chutney", 25, 15.00),
+        ("tamarind_chutney", "Sweet Tamarind Chutney", 60, 15.00),
+        ("garlic_chutney", "Spicy Garlic Chutney", 40, 15.00),
+        ("boondi_raita", "Boondi Raita", 120, 40.00),
+        ("mixed_pickle", "Mixed Pickle (Achar)", 50, 10.00),
+        ("onion_salad", "Lachha Onion Salad", 30, 20.00),
+    )
+    sauces = []
+
+    for item_id, name, calories, price in raw_items:
+        sauces.append(
+            MenuItem(
+                id=sys.intern(item_id),
+                name=sys.intern(name),
+                calories=calories,
+                price=price,
+                available=True,
+                category=ItemCategory.SAUCE,
+                size=None,
+                voice_alias=None,
+            )
+        )
+
+    return sauces
+
+
+# The menu is static, so it is built once at import. FakeDB hands out the tuples
+# themselves, neither they nor the frozen items can be modified so there's no need to
+# copy them.
+# The string fields are interned so that, once the rows come from a real database rather
+# than source literals, every size variant shares one id string and the index lookups
+# below can match on identity.
+_DRINKS = tuple(_build_drinks())
+_COMBO_MEALS = tuple(_build_combo_meals())
+_HAPPY_MEALS = tuple(_build_happy_meals())
+_REGULARS = tuple(_build_regulars())
+_SAUCES = tuple(_build_sauces())
+
+_BY_CATEGORY: dict[ItemCategory, tuple[MenuItem, ...]] = {
+    ItemCategory.DRINK: _DRINKS,
+    ItemCategory.COMBO_MEAL: _COMBO_MEALS,
+    ItemCategory.HAPPY_MEAL: _HAPPY_MEALS,
+    ItemCategory.REGULAR: _REGULARS,
+    ItemCategory.SAUCE: _SAUCES,
+}
 
-        return sauces
 
+def _build_index() -> Mapping[str, tuple[MenuItem, ...]]:
+    by_id: dict[str, list[MenuItem]] = {}
+    for items in _BY_CATEGORY.values():
+        for item in items:
+            by_id.setdefault(item.id, []).append(item)
+    # read-only, like the menu tuples it is shared by every session
+    return MappingProxyType({item_id: tuple(group) for item_id, group in by_id.items()})
 
-# The code below is optimized for ease of use instead of efficiency.
+
+# id -> all size variants, over the whole static menu
+_BY_ID = _build_index()
+
+
+class FakeDB:
+    async def list_items(self, category: ItemCategory | str) -> tuple[MenuItem, ...]:
+        return _BY_CATEGORY[ItemCategory(category)]
+
+    # kept as thin wrappers over list_items for existing callers
+    async def list_drinks(self) -> tuple[MenuItem, ...]:
+        return await self.list_items(ItemCategory.DRINK)
+
+    async def list_combo_meals(self) -> tuple[MenuItem, ...]:
+        return await self.list_items(ItemCategory.COMBO_MEAL)
+
+    async def list_happy_meals(self) -> tuple[MenuItem, ...]:
+        return await self.list_items(ItemCategory.HAPPY_MEAL)
+
+    async def list_regulars(self) -> tuple[MenuItem, ...]:
+        return await self.list_items(ItemCategory.REGULAR)
+
+    async def list_sauces(self) -> tuple[MenuItem, ...]:
+        return await self.list_items(ItemCategory.SAUCE)
+
+    async def list_items_by_id(self) -> Mapping[str, tuple[MenuItem, ...]]:
+        """Returns the size variants of every menu item, keyed by id."""
+        return _BY_ID
+
+    async def list_all(self) -> dict[ItemCategory, tuple[MenuItem, ...]]:
+        """Fetches every menu category, issuing the queries concurrently."""
+        categories = tuple(_BY_CATEGORY)
+        menus = await asyncio.gather(*(self.list_items(category) for category in categories))
+        return dict(zip(categories, menus))
+
+
+# The code below renders the menu sections of the prompt. For the static menu it runs
+# once per category, behind the _render_menu cache, so it favours ease of use over speed.
 
 
 def map_by_sizes(
-    items: list[MenuItem],
+    items: Sequence[MenuItem],
 ) -> tuple[dict[str, dict[ItemSize, MenuItem]], list[MenuItem]]:
-    result = defaultdict(dict)
-    leftovers = [item for item in items if not item.size]
-    [result[item.id].update({item.size: item}) for item in items if item.size]
-    return dict(result), leftovers
+    result: dict[str, dict[ItemSize, MenuItem]] = {}
+    leftovers: list[MenuItem] = []
+    for item in items:
+        if item.size:
+            result.setdefault(item.id, {})[item.size] = item
+        else:
+            leftovers.append(item)
+    return result, leftovers
 
 
 def find_items_by_id(
-    items: list[MenuItem], item_id: str, size: ItemSize | None = None
+    items: Sequence[MenuItem], item_id: str, size: ItemSize | str | None = None
 ) -> list[MenuItem]:
     return [item for item in items if item.id == item_id and (size is None or item.size == size)]
 
 
-def menu_instructions(category: ItemCategory, *, items: list[MenuItem]) -> str:
-    if category == "drink":
-        return _drink_menu_instructions(items)
-    elif category == "combo_meal":
-        return _combo_menu_instructions(items)
-    elif category == "happy_meal":
-        return _happy_menu_instructions(items)
-    elif category == "sauce":
-        return _sauce_menu_instructions(items)
-    elif category == "regular":
-        return _regular_menu_instructions(items)
+def menu_instructions(
+    category: ItemCategory | str, *, items: Sequence[MenuItem] | None = None
+) -> str:
+    """Renders the prompt section listing the `category` menu.
+
+    Without `items`, the static FakeDB menu is rendered; the text is built once per
+    category and cached (clear it with `_render_menu.cache_clear()` if the menu changes).
+    """
+    # a mypyc build checks argument types at runtime, plain strings are converted here
+    category = ItemCategory(category)
+    if items is None:
+        return _render_menu(category)
+    return _render_items(category, items)
+
+
+@functools.cache
+def _render_menu(category: ItemCategory) -> str:
+    return _render_items(category, _BY_CATEGORY[category])
 
 
-def _drink_menu_instructions(items: list[MenuItem]) -> str:
-    available_sizes, leftovers = map_by_sizes(items)
+def _render_items(category: ItemCategory, items: Sequence[MenuItem]) -> str:
+    return _RENDERERS[category](items)
+
+
+def _sized_menu_lines(
+    grouped: tuple[dict[str, dict[ItemSize, MenuItem]], list[MenuItem]],
+) -> str:
+    # renders the output of map_by_sizes: each sized item under its name, then the rest
+    available_sizes, leftovers = grouped
     menu_lines = []
 
     for _, size_map in available_sizes.items():
         first_item = next(iter(size_map.values()))
         menu_lines.append(f"  - {first_item.name} (id:{first_item.id}):")
 
-        for item in size_map.values():
-            line = f"    - Size {item.size}: {item.calories} Cal, ₹{item.price:.2f}"
-            if not item.available:
-                line += " UNAVAILABLE"
-            menu_lines.append(line)
+        menu_lines.extend(item.menu_line for item in size_map.values())
 
-    for item in leftovers:
-        # explicitely saying there is no `size` for this item, otherwise the LLM seems to hallucinate quite often
-        line = f"  - {item.name}: {item.calories} Cal, ₹{item.price:.2f} (id:{item.id}) - Not size-selectable`"
-        if not item.available:
-            line += " UNAVAILABLE"
-        menu_lines.append(line)
+    menu_lines.extend(item.menu_line for item in leftovers)
 
-    return "# Drinks:\n" + "\n".join(menu_lines)
+    return "\n".join(menu_lines)
 
 
-def _combo_menu_instructions(items: list[MenuItem]) -> str:
-    menu_lines = []
-    for item in items:
-        line = f"  **{item.voice_alias}**. {item.name}: {item.calories} Cal, ₹{item.price:.2f} (id:{item.id})"
+def _drink_menu_instructions(items: Sequence[MenuItem]) -> str:
+    return "# Drinks:\n" + _sized_menu_lines(map_by_sizes(items))
 
-        if not item.available:
-            line += " UNAVAILABLE"
-        menu_lines.append(line)
 
+def _combo_menu_instructions(items: Sequence[MenuItem]) -> str:
     instructions = (
         "# Combo Meals / Thalis:\n"
         "The user can select a combo meal by saying its voice alias (e.g., '1', '2', '4'). Use the alias to identify which combo they chose.\n"
         "But don't mention the voice alias to the user if not needed."
     )
-    return instructions + "\n".join(menu_lines)
+    return instructions + "\n".join(item.menu_line for item in items)
 
 
-def _happy_menu_instructions(items: list[MenuItem]) -> str:
-    menu_lines = []
-    for item in items:
-        line = f"  - {item.name}: {item.calories} Cal, ₹{item.price:.2f} (id:{item.id})"
-        if not item.available:
-            line += " UNAVAILABLE"
-        menu_lines.append(line)
-
+def _happy_menu_instructions(items: Sequence[MenuItem]) -> str:
     return (
-        "# Kid's Meals:\n" + "\n".join(menu_lines) + "\n\nRecommended drinks with the Kid's Meal:\n"
+        "# Kid's Meals:\n" + "\n".join(item.menu_line for item in items) + "\n\nRecommended drinks with the Kid's Meal:\n"
         "  - Mango Lassi\n"
         "  - Bottled Water\n"
         "  - Or any other small drink."
     )
 
 
-def _sauce_menu_instructions(items: list[MenuItem]) -> str:
-    menu_lines = []
-    for item in items:
-        line = f"  - {item.name}: {item.calories} Cal, ₹{item.price:.2f} (id:{item.id})"
-        if not item.available:
-            line += " UNAVAILABLE"
-        menu_lines.append(line)
-
-    return "# Chutneys & Extras:\n" + "\n".join(menu_lines)
+def _sauce_menu_instructions(items: Sequence[MenuItem]) -> str:
+    return "# Chutneys & Extras:\n" + "\n".join(item.menu_line for item in items)
 
 
 # regular/a la carte
-def _regular_menu_instructions(items: list[MenuItem]) -> str:
-    available_sizes, leftovers = map_by_sizes(items)
-    menu_lines = []
-
-    for _, size_map in available_sizes.items():
-        first_item = next(iter(size_map.values()))
-        menu_lines.append(f"  - {first_item.name} (id:{first_item.id}):")
-
-        for item in size_map.values():
-            line = f"    - Size {item.size}: {item.calories} Cal, ₹{item.price:.2f}"
-            if not item.available:
-                line += " UNAVAILABLE"
-            menu_lines.append(line)
+def _regular_menu_instructions(items: Sequence[MenuItem]) -> str:
+    return "# Regular items/À la carte:\n" + _sized_menu_lines(map_by_sizes(items))
 
-    for item in leftovers:
-        line = f"  - {item.name}: {item.calories} Cal, ₹{item.price:.2f} (id:{item.id}) - Not size-selectable"
-        if not item.available:
-            line += " UNAVAILABLE"
-        menu_lines.append(line)
 
-    return "# Regular items/À la carte:\n" + "\n".join(menu_lines)
\ No newline at end of file
+_RENDERERS: dict[ItemCategory, Callable[[Sequence[MenuItem]], str]] = {
+    ItemCategory.DRINK: _drink_menu_instructions,
+    ItemCategory.COMBO_MEAL: _combo_menu_instructions,
+    ItemCategory.HAPPY_MEAL: _happy_menu_instructions,
+    ItemCategory.REGULAR: _regular_menu_instructions,
+    ItemCategory.SAUCE: _sauce_menu_instructions,
+}
@@ -41,15 +41,20 @@ class OrderedRegular(BaseModel):
 OrderedItem = Annotated[OrderedCombo | OrderedHappy | OrderedRegular, Field(discriminator="type")]
 
 
-@dataclass
+@dataclass(slots=True)
 class OrderState:
     items: dict[str, OrderedItem]
+    # bumped on every change, lets readers tell whether the order moved on
+    version: int = 0
 
     async def add(self, item: OrderedItem) -> None:
         self.items[item.order_id] = item
+        self.version += 1
 
     async def remove(self, order_id: str) -> OrderedItem:
-        return self.items.pop(order_id)
+        item = self.items.pop(order_id)
+        self.version += 1
+        return item
 
     def get(self, order_id: str) -> OrderedItem | None:
         return self.items.get(order_id)
\ No newline at end of file
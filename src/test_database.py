@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import importlib.util
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import sysconfig
+from pathlib import Path
+
+import pytest
+
+from .database import ItemCategory, ItemSize, MenuItem, find_items_by_id
+
+
+def _drink(item_id: str, size: ItemSize) -> MenuItem:
+    return MenuItem(
+        id=item_id,
+        name=item_id,
+        calories=100,
+        price=40.0,
+        available=True,
+        category=ItemCategory.DRINK,
+        size=size,
+    )
+
+
+def test_find_items_by_id_unsorted() -> None:
+    # the size variants of an item don't have to be next to each other
+    items = [
+        _drink("thums_up", ItemSize.S),
+        _drink("limca", ItemSize.S),
+        _drink("thums_up", ItemSize.M),
+        _drink("thums_up", ItemSize.L),
+    ]
+
+    assert find_items_by_id(items, "thums_up") == [items[0], items[2], items[3]]
+    assert find_items_by_id(items, "thums_up", ItemSize.M) == [items[2]]
+    assert find_items_by_id(items, "fanta") == []
+
+
+_COMPILED_CHECK = """
+import asyncio
+
+import database
+from database import FakeDB, ItemCategory, ItemSize, find_items_by_id, menu_instructions
+
+assert not database.__file__.endswith(".py"), database.__file__
+
+drinks = asyncio.run(FakeDB().list_items("drink"))
+assert drinks is asyncio.run(FakeDB().list_items(ItemCategory.DRINK))
+assert menu_instructions("drink", items=list(drinks)) == menu_instructions(ItemCategory.DRINK)
+assert menu_instructions("sauce") == menu_instructions(ItemCategory.SAUCE)
+assert find_items_by_id(drinks, "thums_up", "M") == find_items_by_id(drinks, "thums_up", ItemSize.M)
+"""
+
+
+def _skip_unless_mypyc_can_build() -> None:
+    for module in ("mypyc", "setuptools"):
+        if importlib.util.find_spec(module) is None:
+            pytest.skip(f"{module} is not installed")
+    compiler = shlex.split(sysconfig.get_config_var("CC") or "cc")[0]
+    if shutil.which(compiler) is None:
+        pytest.skip(f"no C compiler ({compiler})")
+    if not os.path.exists(os.path.join(sysconfig.get_paths()["include"], "Python.h")):
+        pytest.skip("the Python headers are not installed")
+
+
+@pytest.mark.mypyc
+def test_compiled_module_accepts_plain_strings(tmp_path) -> None:
+    _skip_unless_mypyc_can_build()
+    shutil.copy(Path(__file__).with_name("database.py"), tmp_path)
+    subprocess.run(
+        [sys.executable, "-m", "mypyc", "database.py"],
+        cwd=tmp_path,
+        check=True,
+        capture_output=True,
+    )
+    # a fresh interpreter, so the extension module is imported instead of the source
+    subprocess.run([sys.executable, "-c", _COMPILED_CHECK], cwd=tmp_path, check=True)
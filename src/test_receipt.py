@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from livekit.agents import ToolError
+
+from .agent import (
+    DriveThruAgent,
+    OrderedRegular,
+    ReceiptWriter,
+    Userdata,
+    _append_receipt,
+    _receipt_row,
+    build_receipt,
+    new_userdata,
+)
+
+
+class _SlowWriter(ReceiptWriter):
+    """Records every write, holding the first ones for `delays` seconds like a slow disk."""
+
+    def __init__(self, path: str, *delays: float) -> None:
+        super().__init__(path)
+        self.delays = list(delays)
+        self.writes: list[bytes] = []
+
+    def _write(self, data: bytes) -> None:
+        if self.delays:
+            time.sleep(self.delays.pop(0))
+        super()._write(data)
+        self.writes.append(data)
+
+
+async def _add_item(userdata: Userdata, item_id: str) -> None:
+    item = OrderedRegular(item_id=item_id)
+    await userdata.order.add(item)
+    _append_receipt(userdata, item)
+
+
+def _rebuilt_receipt(userdata: Userdata) -> tuple[list, float]:
+    # what the receipt looks like when rebuilt from the order itself
+    rows = [_receipt_row(userdata.by_id, item) for item in userdata.order.items.values()]
+    return rows, sum(row.price for row in rows)
+
+
+def _read_receipt(path) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.mark.asyncio
+async def test_receipt_writer_coalesces_updates(tmp_path) -> None:
+    userdata = await new_userdata()
+    path = tmp_path / "receipt.json"
+    writer = _SlowWriter(str(path), 0.05)
+    writer.start()
+
+    await _add_item(userdata, "vada_pav")
+    writer.schedule(userdata)
+    await asyncio.sleep(0.01)  # let the first write start
+
+    # scheduled while the first write is in flight, only the newest is written
+    for item_id in ("butter_naan", "garlic_naan", "rasmalai"):
+        await _add_item(userdata, item_id)
+        writer.schedule(userdata)
+
+    await writer.aclose()
+
+    assert len(writer.writes) == 2
+    assert len(_read_receipt(path)["items"]) == 4
+
+
+@pytest.mark.asyncio
+async def test_receipt_writer_skips_unchanged_order(tmp_path) -> None:
+    userdata = await new_userdata()
+    writer = _SlowWriter(str(tmp_path / "receipt.json"))
+    writer.start()
+
+    await _add_item(userdata, "vada_pav")
+    writer.schedule(userdata)
+    await asyncio.sleep(0.05)
+    writer.schedule(userdata)
+    await writer.aclose()
+
+    assert len(writer.writes) == 1
+
+
+@pytest.mark.asyncio
+async def test_receipt_writer_flushes_on_close(tmp_path) -> None:
+    userdata = await new_userdata()
+    path = tmp_path / "receipt.json"
+    writer = _SlowWriter(str(path), 0.2)
+    writer.start()
+
+    await _add_item(userdata, "vada_pav")
+    writer.schedule(userdata)
+    await asyncio.sleep(0.01)  # let the first write start
+
+    await _add_item(userdata, "butter_naan")
+    writer.schedule(userdata)
+    # closing mid-write waits for it, then writes the pending update
+    await writer.aclose()
+
+    assert len(writer.writes) == 2
+    receipt = _read_receipt(path)
+    assert [row["name"] for row in receipt["items"]] == ["Vada Pav", "Butter Naan"]
+    assert receipt["total_price"] == 90.0
+    assert list(tmp_path.iterdir()) == [path]
+
+
+@pytest.mark.asyncio
+async def test_receipt_writer_survives_encode_errors(tmp_path) -> None:
+    userdata = await new_userdata()
+    path = tmp_path / "receipt.json"
+    writer = _SlowWriter(str(path))
+    encode = writer._encode
+    failures = [TypeError("not serializable")]
+
+    def flaky_encode(userdata: Userdata) -> bytes:
+        if failures:
+            raise failures.pop()
+        return encode(userdata)
+
+    writer._encode = flaky_encode  # type: ignore[method-assign]
+    writer.start()
+
+    await _add_item(userdata, "vada_pav")
+    writer.schedule(userdata)
+    await asyncio.sleep(0.05)
+
+    await _add_item(userdata, "butter_naan")
+    writer.schedule(userdata)
+    await writer.aclose()
+
+    assert len(writer.writes) == 1
+    assert len(_read_receipt(path)["items"]) == 2
+
+
+def test_receipt_writers_on_the_same_path(tmp_path) -> None:
+    path = tmp_path / "receipt.json"
+    payloads = [json.dumps({"writer": i, "pad": "x" * 100_000}).encode() for i in range(4)]
+
+    errors: list[BaseException] = []
+
+    def write_many(payload: bytes) -> None:
+        writer = ReceiptWriter(str(path))
+        try:
+            for _ in range(20):
+                writer._write(payload)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write_many, args=(payload,)) for payload in payloads]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    # the receipt is always one whole payload, and no temporary file is left behind
+    assert path.read_bytes() in payloads
+    assert list(tmp_path.iterdir()) == [path]
+
+
+@pytest.mark.asyncio
+async def test_receipt_follows_the_order() -> None:
+    userdata = await new_userdata()
+    ctx = SimpleNamespace(userdata=userdata)
+    agent = DriveThruAgent(userdata=userdata)
+    order_regular_item = agent.build_regular_order_tool(userdata)
+
+    for item_id in ("vada_pav", "butter_naan", "garlic_naan"):
+        await order_regular_item(ctx, item_id=item_id)
+    receipt = build_receipt(userdata)
+    assert (receipt.items, receipt.total_price) == _rebuilt_receipt(userdata)
+    first, second, third = userdata.order.items
+
+    # a repeated id is removed once
+    await agent.remove_order_item(ctx, order_id=[first, first])
+    receipt = build_receipt(userdata)
+    assert list(userdata.order.items) == [second, third]
+    assert (receipt.items, receipt.total_price) == _rebuilt_receipt(userdata)
+
+    # nothing is removed when one of the ids is unknown
+    with pytest.raises(ToolError):
+        await agent.remove_order_item(ctx, order_id=[second, first])
+    receipt = build_receipt(userdata)
+    assert list(userdata.order.items) == [second, third]
+    assert (receipt.items, receipt.total_price) == _rebuilt_receipt(userdata)
+
+    await agent.remove_order_item(ctx, order_id=[second, third])
+    receipt = build_receipt(userdata)
+    assert receipt.items == []
+    assert receipt.total_price == 0.0